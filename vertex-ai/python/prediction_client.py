@@ -7,31 +7,49 @@ Production-ready client for Vertex AI online predictions with:
 - Circuit breaker pattern
 - Request/response logging
 - OpenTelemetry tracing
-- Streaming support
+- Micro-batching of concurrent requests
+- Streaming support (server_streaming_predict)
 """
 
 import os
 import json
+import asyncio
+import functools
 import time
 import logging
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Any, NoReturn, Optional, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
 import google.auth
 from google.auth.transport.requests import Request
+from google.api_core import exceptions as google_exceptions
 from google.cloud import aiplatform
-from google.cloud.aiplatform.gapic import PredictionServiceClient
+from google.cloud.aiplatform.gapic import (
+    EndpointServiceClient,
+    PredictionServiceAsyncClient,
+    PredictionServiceClient,
+)
+from google.cloud.aiplatform_v1.services.endpoint_service.transports import (
+    EndpointServiceGrpcTransport,
+)
+from google.cloud.aiplatform_v1.services.prediction_service.transports import (
+    PredictionServiceGrpcAsyncIOTransport,
+    PredictionServiceGrpcTransport,
+)
+from google.cloud.aiplatform_v1.types import Tensor
 from google.protobuf import json_format
 from google.protobuf.struct_pb2 import Value
-import requests
 from tenacity import (
     retry,
     stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
+    wait_exponential_jitter,
+    retry_if_exception,
 )
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.trace import Status, StatusCode
 
 # Configure logging
@@ -41,8 +59,224 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# OpenTelemetry tracer
+# OpenTelemetry tracer and meter
 tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+# Keep the HTTP/2 connection warm between requests so predictions don't pay
+# for a fresh TLS handshake after idle periods
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.max_send_message_length", 100 * 1024 * 1024),
+    ("grpc.max_receive_message_length", 100 * 1024 * 1024),
+]
+
+
+# Seconds get_endpoint_info() reuses a fetched result
+ENDPOINT_INFO_TTL = 30
+
+CLOUD_PLATFORM_SCOPES = ("https://www.googleapis.com/auth/cloud-platform",)
+
+# Credentials shared by every client in the process, keyed by scopes and the
+# service account file in effect, so google.auth.default() runs once each
+_creds_cache: Dict[tuple, Any] = {}
+_creds_lock = threading.Lock()
+
+
+def _get_credentials(scopes: tuple = CLOUD_PLATFORM_SCOPES):
+    """Return cached default credentials for these scopes, loading on first use"""
+    key = (frozenset(scopes), os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"))
+    
+    with _creds_lock:
+        credentials = _creds_cache.get(key)
+        if credentials is None:
+            credentials, _ = google.auth.default(scopes=list(scopes))
+            _creds_cache[key] = credentials
+    return credentials
+
+
+# Serializes the check-then-init in _init_aiplatform(); VertexAIClient uses
+# the same helper, so both clients update the global config under one lock
+_aiplatform_init_lock = threading.Lock()
+
+
+def _init_aiplatform(project: str, location: str, credentials=None) -> None:
+    """
+    Call aiplatform.init() unless the SDK's global config already matches
+
+    The config is process-global and other code (the application) may
+    change it, so compare against it directly rather than remembering what
+    was last set. With credentials=None the SDK's own credentials are kept.
+    """
+    config = aiplatform.initializer.global_config
+    with _aiplatform_init_lock:
+        try:
+            configured = (
+                config.project == project
+                and config.location == location
+                and (credentials is None or config.credentials is credentials)
+            )
+        except Exception:
+            # Unset defaults that can't be resolved
+            configured = False
+        
+        if not configured:
+            aiplatform.init(project=project, location=location, credentials=credentials)
+
+
+# Service clients shared by every PredictionClient on the same regional host
+# and credentials; gRPC channels are safe to use from many clients at once
+_service_clients: Dict[tuple, tuple] = {}
+_service_clients_lock = threading.Lock()
+
+
+def _get_service_clients(api_endpoint: str, credentials) -> tuple:
+    """Return (PredictionServiceClient, EndpointServiceClient) on a shared channel"""
+    key = (api_endpoint, id(credentials))
+    
+    with _service_clients_lock:
+        clients = _service_clients.get(key)
+        if clients is None:
+            channel = PredictionServiceGrpcTransport.create_channel(
+                api_endpoint,
+                credentials=credentials,
+                options=GRPC_CHANNEL_OPTIONS,
+            )
+            clients = (
+                PredictionServiceClient(
+                    transport=PredictionServiceGrpcTransport(
+                        host=api_endpoint,
+                        channel=channel,
+                    )
+                ),
+                # Endpoint metadata lookups share the same channel
+                EndpointServiceClient(
+                    transport=EndpointServiceGrpcTransport(
+                        host=api_endpoint,
+                        channel=channel,
+                    )
+                ),
+            )
+            _service_clients[key] = clients
+    return clients
+
+
+@functools.lru_cache(maxsize=128)
+def _params_to_proto(params_json: str) -> Value:
+    """
+    Parse prediction parameters into a protobuf Value, memoized
+
+    Parameters are usually the same handful of dicts reused across requests,
+    so the parsed Value is cached by its canonical JSON. The returned message
+    is shared and must not be mutated.
+    """
+    value = Value()
+    json_format.Parse(params_json, value)
+    return value
+
+
+# Cached Value builders keyed by instance shape, see _instance_to_proto()
+_INSTANCE_FILLERS: Dict[tuple, Optional[Callable[[Dict], Value]]] = {}
+_MAX_INSTANCE_FILLERS = 256
+
+_SCALAR_VALUE_FIELDS = {
+    str: "string_value",
+    bool: "bool_value",
+    int: "number_value",
+    float: "number_value",
+}
+
+
+def _build_instance_filler(shape: tuple) -> Optional[Callable[[Dict], Value]]:
+    """
+    Build a function that fills a struct Value for instances of this shape
+
+    Only flat dicts of str/bool/number values are supported; anything else
+    returns None and is left to json_format.ParseDict.
+    """
+    if not shape:
+        return None
+    
+    setters = []
+    for key, value_type in shape:
+        field_name = _SCALAR_VALUE_FIELDS.get(value_type)
+        if not isinstance(key, str) or field_name is None:
+            return None
+        setters.append((key, field_name))
+    
+    def fill(instance: Dict) -> Value:
+        value = Value()
+        fields = value.struct_value.fields
+        for key, field_name in setters:
+            setattr(fields[key], field_name, instance[key])
+        return value
+    
+    return fill
+
+
+def _instance_to_proto(instance: Any) -> Value:
+    """
+    Convert one instance to a protobuf Value
+
+    Serving traffic tends to repeat the same instance schema, so flat
+    instances are written straight into the struct fields by a filler cached
+    per (key, type) shape, skipping ParseDict's per-field type inspection.
+    """
+    if not isinstance(instance, dict):
+        return json_format.ParseDict(instance, Value())
+    
+    shape = tuple((key, type(value)) for key, value in instance.items())
+    try:
+        filler = _INSTANCE_FILLERS[shape]
+    except KeyError:
+        filler = _build_instance_filler(shape)
+        if len(_INSTANCE_FILLERS) < _MAX_INSTANCE_FILLERS:
+            _INSTANCE_FILLERS[shape] = filler
+    
+    if filler is None:
+        return json_format.ParseDict(instance, Value())
+    return filler(instance)
+
+
+def _value_to_tensor(value: Any) -> Tensor:
+    """Convert a JSON-like Python value to a Tensor for streaming requests"""
+    if value is None:
+        return Tensor()
+    elif isinstance(value, bool):
+        return Tensor(bool_val=[value])
+    elif isinstance(value, int):
+        return Tensor(int64_val=[value])
+    elif isinstance(value, float):
+        return Tensor(double_val=[value])
+    elif isinstance(value, str):
+        return Tensor(string_val=[value])
+    elif isinstance(value, bytes):
+        return Tensor(bytes_val=[value])
+    elif isinstance(value, (list, tuple)):
+        return Tensor(list_val=[_value_to_tensor(item) for item in value])
+    elif isinstance(value, dict):
+        return Tensor(struct_val={key: _value_to_tensor(item) for key, item in value.items()})
+    raise TypeError(f"Unsupported value type for Tensor: {type(value).__name__}")
+
+
+def _tensor_to_value(tensor: Tensor) -> Any:
+    """Convert a Tensor from a streaming response back to a Python value"""
+    if tensor.struct_val:
+        return {key: _tensor_to_value(item) for key, item in tensor.struct_val.items()}
+    if tensor.list_val:
+        return [_tensor_to_value(item) for item in tensor.list_val]
+    
+    for field_name in (
+        "string_val", "bool_val", "double_val", "float_val", "int64_val",
+        "int_val", "uint64_val", "uint_val", "bytes_val",
+    ):
+        values = getattr(tensor, field_name)
+        if values:
+            return values[0] if len(values) == 1 else list(values)
+    return None
 
 
 class PredictionError(Exception):
@@ -60,6 +294,39 @@ class ModelUnavailableError(PredictionError):
     pass
 
 
+class CircuitOpenError(ModelUnavailableError):
+    """Raised when the circuit breaker is rejecting requests"""
+    pass
+
+
+def _classify(e: BaseException) -> type:
+    """Map an exception raised by a prediction call to a PredictionError type"""
+    if isinstance(e, PredictionError):
+        return type(e)
+    if isinstance(e, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return QuotaExceededError
+    if isinstance(e, (google_exceptions.ServiceUnavailable, google_exceptions.DeadlineExceeded)):
+        return ModelUnavailableError
+    return PredictionError
+
+
+def _is_retryable(e: BaseException) -> bool:
+    """Only transient unavailability is worth retrying"""
+    if isinstance(e, CircuitOpenError):
+        return False
+    return issubclass(_classify(e), ModelUnavailableError)
+
+
+# Retry transient failures with jittered backoff; quota and validation
+# errors fail fast so retries don't amplify the load that caused them
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+
+
 @dataclass
 class PredictionResponse:
     """Structured prediction response"""
@@ -85,7 +352,7 @@ class CircuitBreakerState(Enum):
 
 
 class CircuitBreaker:
-    """Circuit breaker for fault tolerance"""
+    """Thread-safe circuit breaker for fault tolerance"""
     
     def __init__(
         self,
@@ -100,14 +367,14 @@ class CircuitBreaker:
         self.failure_count = 0
         self.last_failure_time = None
         self.state = CircuitBreakerState.CLOSED
+        
+        # Guards state transitions; concurrent predict() callers and the
+        # micro-batch dispatchers hit the breaker from many threads
+        self._lock = threading.Lock()
     
     def call(self, func, *args, **kwargs):
         """Execute function with circuit breaker protection"""
-        if self.state == CircuitBreakerState.OPEN:
-            if self._should_attempt_reset():
-                self.state = CircuitBreakerState.HALF_OPEN
-            else:
-                raise ModelUnavailableError("Circuit breaker is OPEN")
+        self._before_call()
         
         try:
             result = func(*args, **kwargs)
@@ -117,26 +384,371 @@ class CircuitBreaker:
             self._on_failure()
             raise
     
+    async def call_async(self, func, *args, **kwargs):
+        """Await coroutine function with circuit breaker protection"""
+        self._before_call()
+        
+        try:
+            result = await func(*args, **kwargs)
+            self._on_success()
+            return result
+        except self.expected_exception as e:
+            self._on_failure()
+            raise
+    
+    def call_stream(self, func, *args, **kwargs):
+        """
+        Iterate a generator function with circuit breaker protection
+        
+        Success is only recorded once the stream is exhausted, so a failure
+        part-way through still counts against the breaker.
+        """
+        self._before_call()
+        
+        try:
+            yield from func(*args, **kwargs)
+        except self.expected_exception:
+            self._on_failure()
+            raise
+        self._on_success()
+    
+    def _before_call(self):
+        """Reject the call if open, or move to half-open once recovery is due"""
+        with self._lock:
+            if self.state == CircuitBreakerState.OPEN:
+                if self._should_attempt_reset():
+                    self.state = CircuitBreakerState.HALF_OPEN
+                else:
+                    raise CircuitOpenError("Circuit breaker is OPEN")
+    
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset"""
         return (
             self.last_failure_time is not None
-            and time.time() - self.last_failure_time >= self.recovery_timeout
+            and time.monotonic() - self.last_failure_time >= self.recovery_timeout
         )
     
     def _on_success(self):
         """Handle successful call"""
-        self.failure_count = 0
-        self.state = CircuitBreakerState.CLOSED
+        with self._lock:
+            self.failure_count = 0
+            self.state = CircuitBreakerState.CLOSED
     
     def _on_failure(self):
         """Handle failed call"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.monotonic()
+            
+            if self.failure_count >= self.failure_threshold:
+                self.state = CircuitBreakerState.OPEN
+                logger.error("Circuit breaker opened after %d failures", self.failure_count)
+
+
+# Queued by MicroBatcher.close() to stop a dispatcher
+_STOP_DISPATCHER = object()
+
+
+@dataclass
+class _BatchItem:
+    """Single instance queued for micro-batching, with its result slot"""
+    instance: Dict
+    event: threading.Event = field(default_factory=threading.Event)
+    prediction: Any = None
+    response: Optional[PredictionResponse] = None
+    error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Coalesces instances from concurrent predict() calls into shared requests
+
+    Each distinct parameter set gets its own queue and daemon dispatcher
+    thread. A dispatcher waits for the first instance, then keeps collecting
+    until either max_batch_size instances are queued or max_latency_ms has
+    elapsed, sends them as one request and scatters the predictions back to
+    the waiting callers by index.
+
+    Dispatchers exit after idle_timeout seconds without work, and at most
+    max_queues parameter sets are batched at once; calls for any further
+    parameter set are sent directly. close() stops every dispatcher.
+    """
+
+    def __init__(
+        self,
+        send_fn: Callable[[List[Dict], Optional[Dict]], PredictionResponse],
+        max_batch_size: int = 32,
+        max_latency_ms: float = 20,
+        max_queues: int = 16,
+        idle_timeout: float = 60,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+
+        self.send_fn = send_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.max_queues = max_queues
+        self.idle_timeout = idle_timeout
+
+        self._queues: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(
+        self,
+        instances: List[Dict],
+        parameters: Optional[Dict] = None,
+    ) -> PredictionResponse:
+        """Queue instances and block until all their predictions are back"""
+        if not instances:
+            raise PredictionError("No instances to predict")
+
+        start_time = time.time()
+        items = [_BatchItem(instance=inst) for inst in instances]
+
+        # Enqueue under the lock so an idle dispatcher can't retire the
+        # queue between lookup and put
+        with self._lock:
+            q = self._get_queue(parameters)
+            if q is not None:
+                for item in items:
+                    q.put(item)
+
+        if q is None:
+            return self.send_fn(instances, parameters)
+
+        for item in items:
+            item.event.wait()
+            if item.error is not None:
+                raise item.error
+
+        first = items[0].response
+        return PredictionResponse(
+            predictions=[item.prediction for item in items],
+            deployed_model_id=first.deployed_model_id,
+            metadata=first.metadata,
+            latency_ms=(time.time() - start_time) * 1000,
+        )
+
+    def close(self) -> None:
+        """Stop all dispatchers once they have sent what is already queued"""
+        with self._lock:
+            self._closed = True
+            for q in self._queues.values():
+                q.put(_STOP_DISPATCHER)
+            self._queues.clear()
+
+    def _get_queue(self, parameters: Optional[Dict]) -> Optional[queue.Queue]:
+        """
+        Return the queue for this parameter set, starting its dispatcher if new
+
+        Returns None when closed or at max_queues. Caller must hold the lock.
+        """
+        if self._closed:
+            return None
+
+        key = json.dumps(parameters, sort_keys=True) if parameters else ""
+        q = self._queues.get(key)
+        if q is None:
+            if len(self._queues) >= self.max_queues:
+                return None
+            q = queue.Queue()
+            self._queues[key] = q
+            threading.Thread(
+                target=self._dispatch_loop,
+                args=(key, q, parameters),
+                name="vertex-microbatch",
+                daemon=True,
+            ).start()
+        return q
+
+    def _dispatch_loop(self, key: str, q: queue.Queue, parameters: Optional[Dict]):
+        """Collect batches from the queue and send them until stopped or idle"""
+        while True:
+            try:
+                item = q.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if q.empty():
+                        if self._queues.get(key) is q:
+                            del self._queues[key]
+                        return
+                continue
+            if item is _STOP_DISPATCHER:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_latency
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP_DISPATCHER:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._send(batch, parameters)
+            if stopping:
+                return
+
+    def _send(self, batch: List[_BatchItem], parameters: Optional[Dict]):
+        """Send one coalesced request and hand results back to the callers"""
+        try:
+            response = self.send_fn([item.instance for item in batch], parameters)
+            if len(response.predictions) != len(batch):
+                raise PredictionError(
+                    f"Expected {len(batch)} predictions, got {len(response.predictions)}"
+                )
+            for item, prediction in zip(batch, response.predictions):
+                item.prediction = prediction
+                item.response = response
+        except BaseException as e:
+            for item in batch:
+                item.error = e
+        finally:
+            for item in batch:
+                item.event.set()
+
+
+class _PredCounts:
+    """Running prediction totals owned by a single thread"""
+    __slots__ = ("n", "sum_ms", "err", "flushed_n", "flushed_sum_ms", "flushed_err")
+    
+    def __init__(self):
+        self.n = 0
+        self.sum_ms = 0.0
+        self.err = 0
+        self.flushed_n = 0
+        self.flushed_sum_ms = 0.0
+        self.flushed_err = 0
+
+
+class PredictionMetrics:
+    """
+    Prediction counters aggregated per thread and flushed in bulk
+    
+    Recording only bumps plain attributes on a thread-local _PredCounts per
+    endpoint. Totals are pushed to the OpenTelemetry counters every
+    flush_every predictions on a thread, or every flush_interval seconds by
+    a daemon flusher, so the metrics SDK is called a handful of times per
+    second instead of on every request. Only the owning thread writes
+    n/sum_ms/err and only flush() writes the flushed_* marks, so no lock is
+    needed on the request path.
+    
+    One module-level instance, prediction_metrics, is shared by every
+    PredictionClient so instruments and the flusher thread exist once.
+    """
+    
+    def __init__(
+        self,
+        flush_every: int = 100,
+        flush_interval: float = 1.0,
+    ):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        
+        self._predictions = meter.create_counter(
+            "vertex_ai.predictions",
+            unit="1",
+            description="Prediction requests sent",
+        )
+        self._errors = meter.create_counter(
+            "vertex_ai.prediction_errors",
+            unit="1",
+            description="Prediction requests that failed",
+        )
+        self._latency = meter.create_counter(
+            "vertex_ai.prediction_latency",
+            unit="ms",
+            description="Total prediction latency",
+        )
+        
+        self._local = threading.local()
+        self._counts: List[tuple] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+    
+    def record(self, endpoint_id: str, latency_ms: float, error: bool = False) -> None:
+        """Count one prediction request to endpoint_id on the calling thread"""
+        thread_counts = getattr(self._local, "counts", None)
+        if thread_counts is None:
+            thread_counts = self._local.counts = {}
+        
+        counts = thread_counts.get(endpoint_id)
+        if counts is None:
+            counts = thread_counts[endpoint_id] = self._register(endpoint_id)
         
-        if self.failure_count >= self.failure_threshold:
-            self.state = CircuitBreakerState.OPEN
-            logger.error(f"Circuit breaker opened after {self.failure_count} failures")
+        counts.n += 1
+        counts.sum_ms += latency_ms
+        if error:
+            counts.err += 1
+        
+        if counts.n - counts.flushed_n >= self.flush_every:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Push everything recorded since the last flush to the counters"""
+        totals: Dict[str, List[float]] = {}
+        
+        with self._lock:
+            for thread, endpoint_id, counts in self._counts:
+                # Snapshot first: the owning thread may keep incrementing
+                counts_n, counts_sum_ms, counts_err = counts.n, counts.sum_ms, counts.err
+                total = totals.setdefault(endpoint_id, [0, 0.0, 0])
+                total[0] += counts_n - counts.flushed_n
+                total[1] += counts_sum_ms - counts.flushed_sum_ms
+                total[2] += counts_err - counts.flushed_err
+                counts.flushed_n, counts.flushed_sum_ms, counts.flushed_err = (
+                    counts_n, counts_sum_ms, counts_err
+                )
+            
+            # Drop finished threads once their totals are flushed
+            self._counts = [
+                (thread, endpoint_id, counts)
+                for thread, endpoint_id, counts in self._counts
+                if thread.is_alive() or counts.n != counts.flushed_n
+            ]
+        
+        for endpoint_id, (n, sum_ms, err) in totals.items():
+            attributes = {"endpoint_id": endpoint_id}
+            if n:
+                self._predictions.add(n, attributes)
+                self._latency.add(sum_ms, attributes)
+            if err:
+                self._errors.add(err, attributes)
+    
+    def _register(self, endpoint_id: str) -> _PredCounts:
+        """Create counters for this thread and endpoint, starting the flusher if needed"""
+        counts = _PredCounts()
+        
+        with self._lock:
+            self._counts.append((threading.current_thread(), endpoint_id, counts))
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop,
+                    name="vertex-metrics",
+                    daemon=True,
+                )
+                self._flusher.start()
+        return counts
+    
+    def _flush_loop(self):
+        """Flush on a fixed interval, forever"""
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+# Shared by every PredictionClient
+prediction_metrics = PredictionMetrics()
 
 
 class PredictionClient:
@@ -150,6 +762,11 @@ class PredictionClient:
     - OpenTelemetry tracing
     - Multiple authentication methods
     
+    Spans come from the application's global tracer provider; the client
+    never installs one. Configure sampling there, e.g.
+    TracerProvider(sampler=ParentBased(TraceIdRatioBased(0.01))), and
+    unsampled predictions skip all attribute and status work.
+    
     Example:
         client = PredictionClient(
             project="my-project",
@@ -173,6 +790,7 @@ class PredictionClient:
         credentials_path: Optional[str] = None,
         timeout: int = 60,
         enable_tracing: bool = True,
+        max_concurrency: int = 8,
     ):
         """
         Initialize prediction client
@@ -184,26 +802,46 @@ class PredictionClient:
             credentials_path: Path to service account JSON (optional)
             timeout: Request timeout in seconds
             enable_tracing: Enable OpenTelemetry tracing
+            max_concurrency: Maximum concurrent requests in predict_batch
+                and apredict_batch
         """
         self.project = project
         self.location = location
         self.endpoint_id = endpoint_id
         self.timeout = timeout
         self.enable_tracing = enable_tracing
+        self.max_concurrency = max_concurrency
         
         # Initialize credentials
         if credentials_path:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
         
-        self.credentials, _ = google.auth.default(
-            scopes=["https://www.googleapis.com/auth/cloud-platform"]
-        )
+        self.credentials = _get_credentials(CLOUD_PLATFORM_SCOPES)
+        
+        # Mint the access token now so the first prediction doesn't wait on it
+        if not self.credentials.valid:
+            try:
+                self.credentials.refresh(Request())
+            except Exception as e:
+                logger.warning("Credential pre-refresh failed, retrying on first request: %s", e)
         
         # Initialize Vertex AI
-        aiplatform.init(project=project, location=location, credentials=self.credentials)
+        _init_aiplatform(project, location, self.credentials)
+        
+        # Create prediction service clients on a persistent regional channel
+        self.api_endpoint = f"{location}-aiplatform.googleapis.com"
+        self.client, self.endpoint_client = _get_service_clients(
+            self.api_endpoint,
+            self.credentials,
+        )
         
-        # Create prediction service client
-        self.client = PredictionServiceClient(credentials=self.credentials)
+        # Endpoint cached by get_endpoint_info() and when it was fetched
+        self._endpoint = None
+        self._endpoint_time = 0.0
+        
+        # Async client binds to an event loop, so it is created lazily
+        self._async_client: Optional[PredictionServiceAsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
         
         # Build endpoint path
         self.endpoint_path = self.client.endpoint_path(
@@ -219,13 +857,92 @@ class PredictionClient:
             expected_exception=Exception,
         )
         
-        logger.info(f"Initialized PredictionClient for endpoint: {endpoint_id}")
+        # Opt-in request coalescing, see enable_micro_batching()
+        self._micro_batcher: Optional[MicroBatcher] = None
+        
+        logger.info("Initialized PredictionClient for endpoint: %s", endpoint_id)
+    
+    @property
+    def async_client(self) -> PredictionServiceAsyncClient:
+        """
+        gRPC asyncio client for the running event loop
+        
+        grpc.aio channels only work on the loop they were created on, so the
+        client is rebuilt when called from a different loop (for example a
+        second asyncio.run()).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            channel = PredictionServiceGrpcAsyncIOTransport.create_channel(
+                self.api_endpoint,
+                credentials=self.credentials,
+                options=GRPC_CHANNEL_OPTIONS,
+            )
+            self._async_client = PredictionServiceAsyncClient(
+                transport=PredictionServiceGrpcAsyncIOTransport(
+                    host=self.api_endpoint,
+                    channel=channel,
+                )
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def close(self) -> None:
+        """Stop micro-batching dispatchers"""
+        if self._micro_batcher is not None:
+            self._micro_batcher.close()
+            self._micro_batcher = None
+    
+    async def aclose(self) -> None:
+        """Close the async client's channel and stop micro-batching dispatchers"""
+        if self._async_client is not None:
+            if self._async_client_loop is asyncio.get_running_loop():
+                await self._async_client.transport.close()
+            self._async_client = None
+            self._async_client_loop = None
+        self.close()
+    
+    def __enter__(self) -> "PredictionClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    async def __aenter__(self) -> "PredictionClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+    
+    def enable_micro_batching(
+        self,
+        max_batch_size: int = 32,
+        max_latency_ms: float = 20,
+    ) -> None:
+        """
+        Merge instances from concurrent predict() calls into shared requests
+        
+        Args:
+            max_batch_size: Maximum instances sent in one request
+            max_latency_ms: Maximum time to wait for a batch to fill up
+        """
+        if self._micro_batcher is not None:
+            self._micro_batcher.close()
+        
+        self._micro_batcher = MicroBatcher(
+            send_fn=lambda batch, parameters: self._send_prediction(
+                *self._to_protos(batch, parameters)
+            ),
+            max_batch_size=max_batch_size,
+            max_latency_ms=max_latency_ms,
+        )
+        
+        logger.info(
+            "Micro-batching enabled: max_batch_size=%d, max_latency_ms=%s",
+            max_batch_size,
+            max_latency_ms,
+        )
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        retry=retry_if_exception_type((requests.exceptions.RequestException, Exception)),
-    )
     def predict(
         self,
         instances: Union[Dict, List[Dict]],
@@ -252,73 +969,209 @@ class PredictionClient:
         
         # Start tracing span
         with tracer.start_as_current_span("vertex_ai_predict") as span:
-            span.set_attribute("endpoint_id", self.endpoint_id)
-            span.set_attribute("num_instances", len(instances))
+            recording = span.is_recording()
+            if recording:
+                span.set_attributes({
+                    "endpoint_id": self.endpoint_id,
+                    "num_instances": len(instances),
+                })
             
             try:
-                # Execute with circuit breaker
-                result = self.circuit_breaker.call(
-                    self._make_prediction_request,
-                    instances,
-                    parameters
+                if self._micro_batcher is not None:
+                    # Coalesce with concurrent callers
+                    result = self._micro_batcher.submit(instances, parameters)
+                else:
+                    # Serialize once; retries only repeat the RPC
+                    result = self._send_prediction(
+                        *self._to_protos(instances, parameters)
+                    )
+                
+                if recording:
+                    span.set_status(Status(StatusCode.OK))
+                return result
+                
+            except Exception as e:
+                if recording:
+                    span.set_status(Status(StatusCode.ERROR, str(e)))
+                logger.error("Prediction failed: %s", e)
+                raise
+    
+    async def apredict(
+        self,
+        instances: Union[Dict, List[Dict]],
+        parameters: Optional[Dict] = None,
+    ) -> PredictionResponse:
+        """
+        Make a prediction request without blocking a thread
+        
+        Uses the gRPC asyncio client, so many concurrent predictions share
+        one event loop and one channel.
+        
+        Args:
+            instances: Single instance or list of instances
+            parameters: Optional prediction parameters
+        
+        Returns:
+            PredictionResponse with predictions and metadata
+        
+        Raises:
+            PredictionError: On prediction failure
+            QuotaExceededError: When quota is exceeded
+            ModelUnavailableError: When model is unavailable
+        """
+        # Ensure instances is a list
+        if isinstance(instances, dict):
+            instances = [instances]
+        
+        # Start tracing span
+        with tracer.start_as_current_span("vertex_ai_predict") as span:
+            recording = span.is_recording()
+            if recording:
+                span.set_attributes({
+                    "endpoint_id": self.endpoint_id,
+                    "num_instances": len(instances),
+                })
+            
+            try:
+                # Serialize once; retries only repeat the RPC
+                result = await self._send_prediction_async(
+                    *self._to_protos(instances, parameters)
                 )
                 
-                span.set_status(Status(StatusCode.OK))
+                if recording:
+                    span.set_status(Status(StatusCode.OK))
                 return result
                 
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-                logger.error(f"Prediction failed: {str(e)}")
+                if recording:
+                    span.set_status(Status(StatusCode.ERROR, str(e)))
+                logger.error("Prediction failed: %s", e)
                 raise
     
+    @retry_transient
+    def _send_prediction(
+        self,
+        instances_proto: List[Value],
+        parameters_proto: Optional[Value] = None,
+    ) -> PredictionResponse:
+        """Send serialized instances with retry and circuit breaker protection"""
+        return self.circuit_breaker.call(
+            self._make_prediction_request,
+            instances_proto,
+            parameters_proto
+        )
+    
+    @retry_transient
+    async def _send_prediction_async(
+        self,
+        instances_proto: List[Value],
+        parameters_proto: Optional[Value] = None,
+    ) -> PredictionResponse:
+        """Async counterpart of _send_prediction on the async client"""
+        return await self.circuit_breaker.call_async(
+            self._make_prediction_request_async,
+            instances_proto,
+            parameters_proto
+        )
+    
     def _make_prediction_request(
         self,
-        instances: List[Dict],
-        parameters: Optional[Dict] = None,
+        instances_proto: List[Value],
+        parameters_proto: Optional[Value] = None,
     ) -> PredictionResponse:
         """Internal method to make prediction request"""
         start_time = time.time()
         
-        # Convert instances to protobuf Value
-        instances_proto = [json_format.ParseDict(inst, Value()) for inst in instances]
+        # Make prediction request
+        try:
+            response = self.client.predict(
+                endpoint=self.endpoint_path,
+                instances=instances_proto,
+                parameters=parameters_proto,
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            prediction_metrics.record(self.endpoint_id, (time.time() - start_time) * 1000, error=True)
+            self._raise_prediction_error(e)
         
-        # Convert parameters if provided
-        parameters_proto = None
-        if parameters:
-            parameters_proto = json_format.ParseDict(parameters, Value())
+        latency_ms = (time.time() - start_time) * 1000
+        prediction_metrics.record(self.endpoint_id, latency_ms)
+        
+        return self._parse_response(response, latency_ms)
+    
+    async def _make_prediction_request_async(
+        self,
+        instances_proto: List[Value],
+        parameters_proto: Optional[Value] = None,
+    ) -> PredictionResponse:
+        """Internal method to make prediction request on the async client"""
+        start_time = time.time()
         
         # Make prediction request
         try:
-            response = self.client.predict(
+            response = await self.async_client.predict(
                 endpoint=self.endpoint_path,
                 instances=instances_proto,
                 parameters=parameters_proto,
                 timeout=self.timeout,
             )
         except Exception as e:
-            error_msg = str(e)
-            
-            # Handle specific errors
-            if "quota" in error_msg.lower() or "429" in error_msg:
-                raise QuotaExceededError(f"Quota exceeded: {error_msg}")
-            elif "503" in error_msg or "unavailable" in error_msg.lower():
-                raise ModelUnavailableError(f"Model unavailable: {error_msg}")
-            else:
-                raise PredictionError(f"Prediction failed: {error_msg}")
+            prediction_metrics.record(self.endpoint_id, (time.time() - start_time) * 1000, error=True)
+            self._raise_prediction_error(e)
         
         latency_ms = (time.time() - start_time) * 1000
+        prediction_metrics.record(self.endpoint_id, latency_ms)
+        
+        return self._parse_response(response, latency_ms)
+    
+    def _to_protos(
+        self,
+        instances: List[Dict],
+        parameters: Optional[Dict] = None,
+    ) -> tuple:
+        """Convert instances and parameters to protobuf Values"""
+        instances_proto = [_instance_to_proto(inst) for inst in instances]
+        
+        parameters_proto = None
+        if parameters:
+            parameters_proto = _params_to_proto(json.dumps(parameters, sort_keys=True))
+        
+        return instances_proto, parameters_proto
+    
+    def _raise_prediction_error(self, e: Exception) -> NoReturn:
+        """Map a failed prediction RPC to a PredictionError subclass"""
+        error_type = _classify(e)
+        # API errors carry their message; avoid str(e), which also renders
+        # the status details
+        error_msg = e.message if isinstance(e, google_exceptions.GoogleAPICallError) else str(e)
         
-        # Parse response
-        predictions = [json_format.MessageToDict(pred) for pred in response.predictions]
+        # Handle specific errors
+        if error_type is QuotaExceededError:
+            raise QuotaExceededError(f"Quota exceeded: {error_msg}") from e
+        elif error_type is ModelUnavailableError:
+            raise ModelUnavailableError(f"Model unavailable: {error_msg}") from e
+        else:
+            raise PredictionError(f"Prediction failed: {error_msg}") from e
+    
+    def _parse_response(self, response, latency_ms: float) -> PredictionResponse:
+        """Convert a PredictResponse proto into a PredictionResponse"""
+        # proto-plus marshals Values to native types on access; convert the
+        # raw protobuf messages instead, as aiplatform.Endpoint.predict does
+        message_to_dict = json_format.MessageToDict
+        predictions = [message_to_dict(pred) for pred in response.predictions.pb]
         deployed_model_id = response.deployed_model_id
-        metadata = json_format.MessageToDict(response.metadata) if response.metadata else {}
+        response_pb = type(response).pb(response)
+        metadata = (
+            message_to_dict(response_pb.metadata)
+            if response_pb.HasField("metadata") else {}
+        )
         
         # Log prediction
         logger.info(
-            f"Prediction successful: "
-            f"latency={latency_ms:.2f}ms, "
-            f"deployed_model={deployed_model_id}, "
-            f"num_predictions={len(predictions)}"
+            "Prediction successful: latency=%.2fms, deployed_model=%s, num_predictions=%d",
+            latency_ms,
+            deployed_model_id,
+            len(predictions),
         )
         
         return PredictionResponse(
@@ -328,6 +1181,90 @@ class PredictionClient:
             latency_ms=latency_ms,
         )
     
+    def stream_predict(
+        self,
+        instances: Union[Dict, List[Dict]],
+        parameters: Optional[Dict] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Make a server-streaming prediction request
+        
+        Yields partial outputs as the model produces them, so LLM callers see
+        the first tokens without waiting for the full completion. Streams are
+        not retried, since chunks may already have been consumed.
+        
+        Args:
+            instances: Single instance or list of instances
+            parameters: Optional prediction parameters
+        
+        Yields:
+            List of outputs in the chunk, one per instance
+        
+        Raises:
+            PredictionError: On prediction failure
+            QuotaExceededError: When quota is exceeded
+            ModelUnavailableError: When model is unavailable
+        """
+        # Ensure instances is a list
+        if isinstance(instances, dict):
+            instances = [instances]
+        
+        # Not a current span: the generator yields back to the caller with
+        # the stream still open
+        span = tracer.start_span("vertex_ai_stream_predict")
+        recording = span.is_recording()
+        if recording:
+            span.set_attributes({
+                "endpoint_id": self.endpoint_id,
+                "num_instances": len(instances),
+            })
+        
+        try:
+            num_chunks = 0
+            for chunk in self.circuit_breaker.call_stream(
+                self._make_streaming_request,
+                instances,
+                parameters
+            ):
+                if num_chunks == 0 and recording:
+                    span.add_event("first_token")
+                num_chunks += 1
+                yield chunk
+            
+            if recording:
+                span.set_attribute("num_chunks", num_chunks)
+                span.set_status(Status(StatusCode.OK))
+            
+        except Exception as e:
+            if recording:
+                span.set_status(Status(StatusCode.ERROR, str(e)))
+            logger.error("Streaming prediction failed: %s", e)
+            raise
+        finally:
+            span.end()
+    
+    def _make_streaming_request(
+        self,
+        instances: List[Dict],
+        parameters: Optional[Dict] = None,
+    ) -> Iterator[List[Any]]:
+        """Internal generator that issues the streaming request"""
+        request = {
+            "endpoint": self.endpoint_path,
+            "inputs": [_value_to_tensor(inst) for inst in instances],
+        }
+        if parameters:
+            request["parameters"] = _value_to_tensor(parameters)
+        
+        try:
+            for response in self.client.server_streaming_predict(
+                request=request,
+                timeout=self.timeout,
+            ):
+                yield [_tensor_to_value(output) for output in response.outputs]
+        except Exception as e:
+            self._raise_prediction_error(e)
+    
     def predict_batch(
         self,
         instances: List[Dict],
@@ -337,51 +1274,132 @@ class PredictionClient:
         """
         Make batch predictions with automatic chunking
         
+        Chunks are sent concurrently, up to max_concurrency at a time. They
+        share the client's circuit breaker, so a burst of failures still
+        trips it quickly. If a chunk fails, chunks not yet started are
+        cancelled and the error is raised.
+        
         Args:
             instances: List of instances to predict
             batch_size: Number of instances per batch
             parameters: Optional prediction parameters
         
         Returns:
-            List of PredictionResponse objects
+            List of PredictionResponse objects, in batch order
         """
-        responses = []
+        batches = [
+            instances[i:i + batch_size]
+            for i in range(0, len(instances), batch_size)
+        ]
+        num_batches = len(batches)
+        if not num_batches:
+            return []
         
-        for i in range(0, len(instances), batch_size):
-            batch = instances[i:i + batch_size]
-            response = self.predict(batch, parameters)
-            responses.append(response)
+        max_workers = min(self.max_concurrency, num_batches)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vertex-batch")
+        try:
+            futures = [executor.submit(self.predict, batch, parameters) for batch in batches]
             
-            logger.info(f"Processed batch {i // batch_size + 1}/{(len(instances) - 1) // batch_size + 1}")
+            responses = []
+            for batch_number, future in enumerate(futures, start=1):
+                responses.append(future.result())
+                logger.info("Processed batch %d/%d", batch_number, num_batches)
+        except BaseException:
+            # Don't send chunks still queued behind a failed one
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
         
+        executor.shutdown(wait=True)
         return responses
     
-    def health_check(self) -> bool:
+    async def apredict_batch(
+        self,
+        instances: List[Dict],
+        batch_size: int = 32,
+        parameters: Optional[Dict] = None,
+    ) -> List[PredictionResponse]:
+        """
+        Make batch predictions concurrently on the async client
+        
+        At most max_concurrency requests are outstanding at once, so large
+        inputs don't burst past the endpoint's quota.
+        
+        Args:
+            instances: List of instances to predict
+            batch_size: Number of instances per batch
+            parameters: Optional prediction parameters
+        
+        Returns:
+            List of PredictionResponse objects, in batch order
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def bounded_predict(batch: List[Dict]) -> PredictionResponse:
+            async with semaphore:
+                return await self.apredict(batch, parameters)
+        
+        return await asyncio.gather(*[
+            bounded_predict(instances[i:i + batch_size])
+            for i in range(0, len(instances), batch_size)
+        ])
+    
+    def health_check(self, deep: bool = False) -> bool:
         """
         Check if endpoint is healthy
         
+        By default this only fetches the endpoint's metadata and checks that
+        a model is deployed, so it doesn't use prediction quota or show up in
+        the model's request logs.
+        
+        Args:
+            deep: Send a real prediction instead, for periodic canary checks
+        
         Returns:
             True if healthy, False otherwise
         """
         try:
-            # Make a simple prediction with minimal instance
-            self.predict({"health_check": True})
+            if deep:
+                # Make a simple prediction with minimal instance
+                self.predict({"health_check": True})
+                return True
+            
+            endpoint = self.endpoint_client.get_endpoint(
+                name=self.endpoint_path,
+                timeout=self.timeout,
+            )
+            if not endpoint.deployed_models:
+                logger.error("Health check failed: no models deployed to %s", self.endpoint_id)
+                return False
             return True
         except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
+            logger.error("Health check failed: %s", e)
             return False
     
-    def get_endpoint_info(self) -> Dict[str, Any]:
+    def get_endpoint_info(self, max_age: float = ENDPOINT_INFO_TTL) -> Dict[str, Any]:
         """
         Get endpoint information
         
+        The result is cached, so callers polling this don't issue a request
+        every time.
+        
+        Args:
+            max_age: Seconds a cached result may be reused (0 to force a fetch)
+        
         Returns:
             Dictionary with endpoint metadata
         """
-        from google.cloud import aiplatform_v1
-        
-        endpoint = aiplatform_v1.Endpoint(self.endpoint_path)
+        if (
+            self._endpoint is None
+            or time.monotonic() - self._endpoint_time >= max_age
+        ):
+            self._endpoint = self.endpoint_client.get_endpoint(
+                name=self.endpoint_path,
+                timeout=self.timeout,
+            )
+            self._endpoint_time = time.monotonic()
         
+        # Built per call so callers can't mutate the cached state
+        endpoint = self._endpoint
         return {
             "name": endpoint.name,
             "display_name": endpoint.display_name,
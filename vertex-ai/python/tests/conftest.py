@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The clients are standalone modules, not an installed package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,77 @@
+"""Tests for the shared aiplatform.init() deduplication"""
+
+import copy
+from unittest import mock
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import aiplatform
+
+import prediction_client
+import vertex_ai_client
+
+
+@pytest.fixture(autouse=True)
+def restore_global_config():
+    """
+    Start each test from a known config and put the original back afterwards
+
+    Anonymous credentials keep the SDK from looking up default credentials.
+    """
+    config = aiplatform.initializer.global_config
+    saved = copy.copy(vars(config))
+    aiplatform.init(
+        project="initial-project",
+        location="europe-west1",
+        credentials=AnonymousCredentials(),
+    )
+    yield
+    vars(config).clear()
+    vars(config).update(saved)
+
+
+def test_skips_init_when_global_config_matches():
+    vertex_ai_client._init_aiplatform("project-a", "us-central1")
+
+    with mock.patch.object(aiplatform, "init", wraps=aiplatform.init) as init:
+        vertex_ai_client._init_aiplatform("project-a", "us-central1")
+
+    init.assert_not_called()
+
+
+def test_reinits_after_another_module_switches_project():
+    credentials = AnonymousCredentials()
+    vertex_ai_client._init_aiplatform("project-a", "us-central1")
+    prediction_client._init_aiplatform("project-b", "us-central1", credentials)
+
+    with mock.patch.object(aiplatform, "init", wraps=aiplatform.init) as init:
+        vertex_ai_client._init_aiplatform("project-a", "us-central1")
+
+    init.assert_called_once()
+    assert aiplatform.initializer.global_config.project == "project-a"
+
+
+def test_prediction_client_reinits_for_new_credentials():
+    first, second = AnonymousCredentials(), AnonymousCredentials()
+    prediction_client._init_aiplatform("project-a", "us-central1", first)
+
+    with mock.patch.object(aiplatform, "init", wraps=aiplatform.init) as init:
+        prediction_client._init_aiplatform("project-a", "us-central1", first)
+        prediction_client._init_aiplatform("project-a", "us-central1", second)
+
+    init.assert_called_once()
+
+
+def test_both_modules_share_one_helper():
+    assert vertex_ai_client._init_aiplatform is prediction_client._init_aiplatform
+
+
+def test_without_credentials_keeps_configured_ones():
+    credentials = AnonymousCredentials()
+    prediction_client._init_aiplatform("project-a", "us-central1", credentials)
+
+    with mock.patch.object(aiplatform, "init", wraps=aiplatform.init) as init:
+        vertex_ai_client._init_aiplatform("project-a", "us-central1")
+
+    init.assert_not_called()
+    assert aiplatform.initializer.global_config.credentials is credentials
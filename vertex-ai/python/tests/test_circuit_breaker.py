@@ -0,0 +1,115 @@
+"""Tests for CircuitBreaker state transitions and thread safety"""
+
+import threading
+
+import pytest
+
+from prediction_client import CircuitBreaker, CircuitBreakerState, CircuitOpenError
+
+
+def fail():
+    raise ValueError("boom")
+
+
+def trip(breaker, times):
+    for _ in range(times):
+        with pytest.raises(ValueError):
+            breaker.call(fail)
+
+
+def test_opens_after_threshold_and_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+    trip(breaker, 2)
+    assert breaker.state is CircuitBreakerState.CLOSED
+
+    trip(breaker, 1)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=3)
+    trip(breaker, 2)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.failure_count == 0
+    assert breaker.state is CircuitBreakerState.CLOSED
+
+
+def test_half_open_after_recovery_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    trip(breaker, 1)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+    # The trial call goes through and closes the breaker again
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state is CircuitBreakerState.CLOSED
+
+    # A failing trial call reopens it
+    trip(breaker, 1)
+    trip(breaker, 1)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+
+def test_unexpected_exceptions_are_not_counted():
+    breaker = CircuitBreaker(failure_threshold=1, expected_exception=KeyError)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.failure_count == 0
+    assert breaker.state is CircuitBreakerState.CLOSED
+
+
+def test_concurrent_failures_are_counted_exactly():
+    threads_count, per_thread = 8, 250
+    breaker = CircuitBreaker(failure_threshold=10**6)
+    barrier = threading.Barrier(threads_count)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            try:
+                breaker.call(fail)
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert breaker.failure_count == threads_count * per_thread
+
+
+def test_call_stream_records_success_only_when_exhausted():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def chunks():
+        yield 1
+        yield 2
+
+    stream = breaker.call_stream(chunks)
+    assert next(stream) == 1
+    assert breaker.state is CircuitBreakerState.CLOSED
+    assert list(stream) == [2]
+    assert breaker.failure_count == 0
+
+
+def test_call_stream_counts_mid_stream_failure():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def chunks():
+        yield 1
+        raise ValueError("stream dropped")
+
+    stream = breaker.call_stream(chunks)
+    assert next(stream) == 1
+    with pytest.raises(ValueError):
+        next(stream)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        next(breaker.call_stream(chunks))
@@ -0,0 +1,74 @@
+"""Equivalence tests for the cached instance fillers vs json_format.ParseDict"""
+
+import pytest
+from google.protobuf import json_format
+from google.protobuf.struct_pb2 import Value
+
+import prediction_client
+from prediction_client import _instance_to_proto
+
+
+def parse_dict(instance):
+    return json_format.ParseDict(instance, Value())
+
+
+@pytest.fixture(autouse=True)
+def clear_fillers():
+    prediction_client._INSTANCE_FILLERS.clear()
+    yield
+    prediction_client._INSTANCE_FILLERS.clear()
+
+
+@pytest.mark.parametrize(
+    "instance",
+    [
+        {"text": "hello", "flag": True, "count": 3, "score": 0.25},
+        {"flag": False, "n": 0, "neg": -7, "big": 2**40},
+        {"unicode": "héllo ✓", "empty": ""},
+        {"nested": {"a": 1}, "x": 1},
+        {"items": [1, 2, 3]},
+        {"missing": None},
+        {},
+        [1, "two", 3.0],
+        "plain string",
+        42,
+        None,
+    ],
+)
+def test_matches_parse_dict(instance):
+    assert _instance_to_proto(instance) == parse_dict(instance)
+
+
+def test_flat_shape_gets_cached_filler():
+    first = {"a": "x", "b": 1.5}
+    second = {"a": "y", "b": 2.5}
+
+    assert _instance_to_proto(first) == parse_dict(first)
+    filler = prediction_client._INSTANCE_FILLERS[(("a", str), ("b", float))]
+    assert filler is not None
+
+    # Same shape reuses the filler and still produces the right values
+    assert _instance_to_proto(second) == parse_dict(second)
+    assert len(prediction_client._INSTANCE_FILLERS) == 1
+
+
+def test_unsupported_shape_falls_back_to_parse_dict():
+    instance = {"nested": {"a": 1}}
+    assert _instance_to_proto(instance) == parse_dict(instance)
+    assert prediction_client._INSTANCE_FILLERS[(("nested", dict),)] is None
+
+
+def test_bool_and_int_with_same_key_are_distinct_shapes():
+    as_bool = {"v": True}
+    as_int = {"v": 1}
+    assert _instance_to_proto(as_bool) == parse_dict(as_bool)
+    assert _instance_to_proto(as_int) == parse_dict(as_int)
+    assert _instance_to_proto(as_bool).struct_value.fields["v"].WhichOneof("kind") == "bool_value"
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(prediction_client, "_MAX_INSTANCE_FILLERS", 2)
+    for i in range(5):
+        instance = {f"k{i}": i}
+        assert _instance_to_proto(instance) == parse_dict(instance)
+    assert len(prediction_client._INSTANCE_FILLERS) == 2
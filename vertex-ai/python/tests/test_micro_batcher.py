@@ -0,0 +1,143 @@
+"""Tests for MicroBatcher coalescing, scatter and lifecycle"""
+
+import threading
+import time
+
+import pytest
+
+from prediction_client import MicroBatcher, PredictionError, PredictionResponse
+
+
+class RecordingSender:
+    """Stub send_fn that doubles each instance's value and records batches"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, instances, parameters):
+        with self.lock:
+            self.batches.append((list(instances), parameters))
+        time.sleep(self.delay)
+        return PredictionResponse(
+            predictions=[inst["x"] * 2 for inst in instances],
+            deployed_model_id="model-1",
+            metadata={},
+            latency_ms=1.0,
+        )
+
+
+def run_concurrently(fn, count):
+    results = {}
+
+    def worker(i):
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_scatters_predictions_back_to_callers_in_order():
+    sender = RecordingSender()
+    batcher = MicroBatcher(sender, max_batch_size=8, max_latency_ms=50)
+
+    results = run_concurrently(
+        lambda i: batcher.submit([{"x": i}, {"x": i + 100}, {"x": i + 200}]),
+        count=10,
+    )
+
+    for i, response in results.items():
+        assert response.predictions == [2 * i, 2 * (i + 100), 2 * (i + 200)]
+        assert response.deployed_model_id == "model-1"
+    assert sum(len(batch) for batch, _ in sender.batches) == 30
+    assert all(len(batch) <= 8 for batch, _ in sender.batches)
+    assert len(sender.batches) < 30
+    batcher.close()
+
+
+def test_separates_parameter_sets():
+    sender = RecordingSender()
+    batcher = MicroBatcher(sender, max_batch_size=32, max_latency_ms=50)
+
+    results = run_concurrently(
+        lambda i: batcher.submit([{"x": i}], {"temperature": i % 2}),
+        count=8,
+    )
+
+    assert all(results[i].predictions == [2 * i] for i in range(8))
+    for batch, parameters in sender.batches:
+        assert all(inst["x"] % 2 == parameters["temperature"] for inst in batch)
+    batcher.close()
+
+
+def test_propagates_send_errors_to_every_caller():
+    def failing_send(instances, parameters):
+        raise PredictionError("boom")
+
+    batcher = MicroBatcher(failing_send, max_batch_size=4, max_latency_ms=20)
+
+    errors = run_concurrently(
+        lambda i: pytest.raises(PredictionError, batcher.submit, [{"x": i}]),
+        count=4,
+    )
+
+    assert all("boom" in str(info.value) for info in errors.values())
+    batcher.close()
+
+
+def test_rejects_prediction_count_mismatch():
+    def short_send(instances, parameters):
+        return PredictionResponse(predictions=[], deployed_model_id="m", metadata={}, latency_ms=0)
+
+    batcher = MicroBatcher(short_send, max_latency_ms=1)
+
+    with pytest.raises(PredictionError, match="Expected 2 predictions"):
+        batcher.submit([{"x": 1}, {"x": 2}])
+    batcher.close()
+
+
+def test_empty_instances_raise_prediction_error():
+    batcher = MicroBatcher(RecordingSender())
+
+    with pytest.raises(PredictionError):
+        batcher.submit([])
+
+
+def test_sends_directly_beyond_max_queues():
+    sender = RecordingSender()
+    batcher = MicroBatcher(sender, max_latency_ms=1, max_queues=1)
+
+    assert batcher.submit([{"x": 1}], {"seed": 1}).predictions == [2]
+    assert batcher.submit([{"x": 2}], {"seed": 2}).predictions == [4]
+
+    assert len(batcher._queues) == 1
+    batcher.close()
+
+
+def test_idle_dispatchers_exit():
+    batcher = MicroBatcher(RecordingSender(), max_latency_ms=1, idle_timeout=0.05)
+
+    batcher.submit([{"x": 1}], {"seed": 1})
+    time.sleep(0.3)
+
+    assert batcher._queues == {}
+    assert not any(t.name == "vertex-microbatch" for t in threading.enumerate())
+    assert batcher.submit([{"x": 3}], {"seed": 1}).predictions == [6]
+    batcher.close()
+
+
+def test_close_stops_dispatchers_and_sends_directly():
+    sender = RecordingSender()
+    batcher = MicroBatcher(sender, max_latency_ms=1)
+    batcher.submit([{"x": 1}])
+
+    batcher.close()
+    time.sleep(0.1)
+
+    assert not any(t.name == "vertex-microbatch" for t in threading.enumerate())
+    assert batcher.submit([{"x": 5}]).predictions == [10]
@@ -0,0 +1,103 @@
+"""Tests for PredictionClient request/response helpers and batching"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+from google.cloud.aiplatform_v1.types import DeployedModel, Endpoint, PredictResponse
+from google.protobuf import json_format
+from google.protobuf.struct_pb2 import Value
+
+from prediction_client import PredictionClient, PredictionError
+
+
+def make_response(predictions, metadata=None):
+    response = PredictResponse(deployed_model_id="model-1")
+    for prediction in predictions:
+        response._pb.predictions.append(json_format.ParseDict(prediction, Value()))
+    if metadata is not None:
+        response._pb.metadata.CopyFrom(json_format.ParseDict(metadata, Value()))
+    return response
+
+
+def test_parse_response_converts_proto_plus_predictions():
+    response = make_response([{"text": "hi", "scores": [0.5, 1]}, "plain"])
+
+    parsed = PredictionClient._parse_response(None, response, 12.5)
+
+    assert parsed.predictions == [{"text": "hi", "scores": [0.5, 1.0]}, "plain"]
+    assert parsed.deployed_model_id == "model-1"
+    assert parsed.metadata == {}
+    assert parsed.latency_ms == 12.5
+
+
+def test_parse_response_converts_metadata():
+    response = make_response([1], metadata={"tokens": 3})
+
+    parsed = PredictionClient._parse_response(None, response, 0.0)
+
+    assert parsed.metadata == {"tokens": 3.0}
+
+
+def make_batch_client(predict, max_concurrency=2):
+    """PredictionClient with only what predict_batch needs"""
+    client = object.__new__(PredictionClient)
+    client.max_concurrency = max_concurrency
+    client.predict = predict
+    return client
+
+
+def test_predict_batch_keeps_chunk_order():
+    def predict(batch, parameters):
+        time.sleep(0.01 * (5 - batch[0]))
+        return list(batch)
+
+    client = make_batch_client(predict, max_concurrency=4)
+
+    assert client.predict_batch(list(range(5)), batch_size=1) == [[0], [1], [2], [3], [4]]
+
+
+def test_predict_batch_stops_sending_after_failure():
+    sent = []
+    lock = threading.Lock()
+
+    def predict(batch, parameters):
+        with lock:
+            sent.append(batch[0])
+        time.sleep(0.05)
+        if batch[0] == 0:
+            raise PredictionError("boom")
+        return batch
+
+    client = make_batch_client(predict, max_concurrency=2)
+
+    with pytest.raises(PredictionError):
+        client.predict_batch(list(range(20)), batch_size=1)
+    assert len(sent) < 20
+
+
+def test_get_endpoint_info_caches_fetch_but_returns_fresh_dicts():
+    client = object.__new__(PredictionClient)
+    client.endpoint_path = "projects/p/locations/l/endpoints/1"
+    client.timeout = 5
+    client._endpoint = None
+    client._endpoint_time = 0.0
+    client.endpoint_client = mock.Mock()
+    client.endpoint_client.get_endpoint.return_value = Endpoint(
+        name=client.endpoint_path,
+        display_name="llm",
+        deployed_models=[DeployedModel(id="42", display_name="v1")],
+        traffic_split={"42": 100},
+    )
+
+    first = client.get_endpoint_info()
+    first["deployed_models"].clear()
+    second = client.get_endpoint_info()
+
+    assert client.endpoint_client.get_endpoint.call_count == 1
+    assert second["deployed_models"][0]["id"] == "42"
+    assert second["traffic_split"] == {"42": 100}
+
+    client.get_endpoint_info(max_age=0)
+    assert client.endpoint_client.get_endpoint.call_count == 2
@@ -0,0 +1,97 @@
+"""Tests for PredictionMetrics per-thread aggregation"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+import prediction_client
+from prediction_client import PredictionMetrics
+
+
+@pytest.fixture
+def reader():
+    reader = InMemoryMetricReader()
+    provider = MeterProvider(metric_readers=[reader])
+    with mock.patch.object(prediction_client, "meter", provider.get_meter("test")):
+        yield reader
+    provider.shutdown()
+
+
+def totals(reader):
+    """Sum each counter's data points by (metric name, endpoint_id)"""
+    result = {}
+    data = reader.get_metrics_data()
+    for resource_metrics in data.resource_metrics if data else []:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                for point in metric.data.data_points:
+                    key = (metric.name, point.attributes["endpoint_id"])
+                    result[key] = result.get(key, 0) + point.value
+    return result
+
+
+def test_flush_reports_totals_per_endpoint(reader):
+    metrics = PredictionMetrics(flush_every=1000, flush_interval=60)
+
+    for _ in range(3):
+        metrics.record("a", 10.0)
+    metrics.record("a", 5.0, error=True)
+    metrics.record("b", 1.0)
+
+    assert totals(reader) == {}
+
+    metrics.flush()
+
+    assert totals(reader) == {
+        ("vertex_ai.predictions", "a"): 4,
+        ("vertex_ai.prediction_latency", "a"): 35.0,
+        ("vertex_ai.prediction_errors", "a"): 1,
+        ("vertex_ai.predictions", "b"): 1,
+        ("vertex_ai.prediction_latency", "b"): 1.0,
+    }
+
+
+def test_flushes_after_flush_every_predictions(reader):
+    metrics = PredictionMetrics(flush_every=10, flush_interval=60)
+
+    for _ in range(10):
+        metrics.record("a", 1.0)
+
+    assert totals(reader)[("vertex_ai.predictions", "a")] == 10
+
+
+def test_counts_every_prediction_across_threads(reader):
+    metrics = PredictionMetrics(flush_every=100, flush_interval=0.01)
+
+    def worker():
+        for i in range(1037):
+            metrics.record("a", 1.0, error=(i % 10 == 0))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.1)
+    metrics.flush()
+
+    result = totals(reader)
+    assert result[("vertex_ai.predictions", "a")] == 8 * 1037
+    assert result[("vertex_ai.prediction_errors", "a")] == 8 * 104
+    assert metrics._counts == []
+
+
+def test_single_flusher_thread():
+    metrics = PredictionMetrics(flush_interval=60)
+
+    metrics.record("a", 1.0)
+    metrics.record("b", 1.0)
+    threading.Thread(target=metrics.record, args=("c", 1.0)).start()
+    time.sleep(0.05)
+
+    assert metrics._flusher is not None
+    assert len([t for t in threading.enumerate() if t is metrics._flusher]) == 1
@@ -0,0 +1,69 @@
+"""Tests for VertexAIClient request coalescing"""
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vertex_ai_client import VertexAIClient
+
+
+class RecordingPredict:
+    """Stub predict() that doubles each instance's value and records requests"""
+
+    def __init__(self, drop: int = 0):
+        self.drop = drop
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, instances, parameters=None):
+        with self.lock:
+            self.requests.append((list(instances), parameters))
+        predictions = [inst["x"] * 2 for inst in instances]
+        return predictions[self.drop:]
+
+
+@pytest.fixture
+def client():
+    # Skip __init__ so no aiplatform.init() runs
+    client = object.__new__(VertexAIClient)
+    client._executor = ThreadPoolExecutor(max_workers=4)
+    yield client
+    client._executor.shutdown(wait=True)
+
+
+def test_predict_batched_splits_back_in_input_order(client):
+    client.predict = RecordingPredict()
+    sizes = [3, 0, 1, 7, 2, 0, 5]
+    batches, x = [], 0
+    for size in sizes:
+        batches.append([{"x": x + i} for i in range(size)])
+        x += size
+
+    results = client.predict_batched("endpoint", batches, max_batch=4, parameters={"t": 1})
+
+    assert results == [[inst["x"] * 2 for inst in batch] for batch in batches]
+    total = sum(sizes)
+    assert len(client.predict.requests) == math.ceil(total / 4)
+    assert all(len(instances) <= 4 for instances, _ in client.predict.requests)
+    assert all(parameters == {"t": 1} for _, parameters in client.predict.requests)
+
+
+def test_predict_batched_all_empty_sends_nothing(client):
+    client.predict = RecordingPredict()
+
+    assert client.predict_batched("endpoint", [[], []]) == [[], []]
+    assert client.predict.requests == []
+
+
+def test_predict_batched_prediction_count_mismatch(client):
+    client.predict = RecordingPredict(drop=1)
+
+    with pytest.raises(ValueError, match="Expected 5 predictions, got 3"):
+        client.predict_batched("endpoint", [[{"x": 1}, {"x": 2}], [{"x": 3}] * 3], max_batch=3)
+
+
+def test_predict_batched_rejects_bad_max_batch(client):
+    with pytest.raises(ValueError):
+        client.predict_batched("endpoint", [[{"x": 1}]], max_batch=0)
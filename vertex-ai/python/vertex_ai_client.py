@@ -15,6 +15,8 @@ from google.auth import default
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
+from prediction_client import _init_aiplatform
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,7 +32,9 @@ class VertexAIClient:
         self,
         project_id: str,
         region: str = "us-central1",
-        credentials_path: Optional[str] = None
+        credentials_path: Optional[str] = None,
+        max_concurrent_requests: int = 16,
+        max_in_flight: int = 16
     ):
         """
         Initialize Vertex AI client
@@ -39,18 +43,43 @@ class VertexAIClient:
             project_id: Google Cloud project ID
             region: Vertex AI region
             credentials_path: Path to service account key (optional)
+            max_concurrent_requests: Worker threads shared by async predictions
+            max_in_flight: Maximum requests predict_batch_parallel has outstanding
         """
         self.project_id = project_id
         self.region = region
+        self.max_in_flight = max_in_flight
         
         # Set credentials if provided
         if credentials_path:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
         
         # Initialize Vertex AI SDK
-        aiplatform.init(project=project_id, location=region)
+        _init_aiplatform(project_id, region)
+        
+        # Shared pool for async predictions, bounds concurrent RPCs
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_requests,
+            thread_name_prefix="vertex-pred"
+        )
         
-        logger.info(f"Initialized Vertex AI client for project: {project_id}, region: {region}")
+        logger.info("Initialized Vertex AI client for project: %s, region: %s", project_id, region)
+    
+    def close(self) -> None:
+        """Shut down the shared prediction thread pool"""
+        self._executor.shutdown(wait=True)
+    
+    def __enter__(self) -> "VertexAIClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    async def __aenter__(self) -> "VertexAIClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
     
     def upload_model(
         self,
@@ -73,7 +102,7 @@ class VertexAIClient:
         Returns:
             Uploaded model object
         """
-        logger.info(f"Uploading model: {display_name}")
+        logger.info("Uploading model: %s", display_name)
         
         model = aiplatform.Model.upload(
             display_name=display_name,
@@ -87,8 +116,8 @@ class VertexAIClient:
             sync=True
         )
         
-        logger.info(f"✅ Model uploaded: {model.resource_name}")
-        logger.info(f"Model ID: {model.name}")
+        logger.info("✅ Model uploaded: %s", model.resource_name)
+        logger.info("Model ID: %s", model.name)
         
         return model
     
@@ -113,7 +142,7 @@ class VertexAIClient:
         Returns:
             Created endpoint object
         """
-        logger.info(f"Creating endpoint: {display_name}")
+        logger.info("Creating endpoint: %s", display_name)
         
         endpoint = aiplatform.Endpoint.create(
             display_name=display_name,
@@ -124,8 +153,8 @@ class VertexAIClient:
             sync=True
         )
         
-        logger.info(f"✅ Endpoint created: {endpoint.resource_name}")
-        logger.info(f"Endpoint ID: {endpoint.name}")
+        logger.info("✅ Endpoint created: %s", endpoint.resource_name)
+        logger.info("Endpoint ID: %s", endpoint.name)
         
         return endpoint
     
@@ -162,10 +191,10 @@ class VertexAIClient:
         Returns:
             Deployment information dictionary
         """
-        logger.info(f"Deploying model {model.display_name} to endpoint {endpoint.display_name}")
-        logger.info(f"Machine type: {machine_type}")
-        logger.info(f"Replicas: {min_replica_count}-{max_replica_count}")
-        logger.info(f"Traffic: {traffic_percentage}%")
+        logger.info("Deploying model %s to endpoint %s", model.display_name, endpoint.display_name)
+        logger.info("Machine type: %s", machine_type)
+        logger.info("Replicas: %d-%d", min_replica_count, max_replica_count)
+        logger.info("Traffic: %d%%", traffic_percentage)
         
         # Deploy model
         deployed_model = model.deploy(
@@ -196,8 +225,8 @@ class VertexAIClient:
             "predict_url": f"https://{self.region}-aiplatform.googleapis.com/v1/{endpoint.resource_name}:predict"
         }
         
-        logger.info(f"✅ Model deployed successfully")
-        logger.info(f"Deployed Model ID: {deployed_model.id}")
+        logger.info("✅ Model deployed successfully")
+        logger.info("Deployed Model ID: %s", deployed_model.id)
         
         return deployment_info
     
@@ -218,14 +247,14 @@ class VertexAIClient:
         Returns:
             List of predictions
         """
-        logger.info(f"Making prediction with {len(instances)} instances")
+        logger.info("Making prediction with %d instances", len(instances))
         
         prediction = endpoint.predict(
             instances=instances,
             parameters=parameters
         )
         
-        logger.info(f"✅ Received {len(prediction.predictions)} predictions")
+        logger.info("✅ Received %d predictions", len(prediction.predictions))
         
         return prediction.predictions
     
@@ -272,16 +301,14 @@ class VertexAIClient:
         Returns:
             List of predictions
         """
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(
-                executor,
-                self.predict,
-                endpoint,
-                instances,
-                parameters
-            )
-        return result
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            self.predict,
+            endpoint,
+            instances,
+            parameters
+        )
     
     async def predict_batch_parallel(
         self,
@@ -292,6 +319,9 @@ class VertexAIClient:
         """
         Make multiple batch predictions in parallel
         
+        At most max_in_flight requests are outstanding at once, so large
+        inputs don't burst past the endpoint's quota.
+        
         Args:
             endpoint: Endpoint to query
             batch_instances: List of batches, each containing instances
@@ -300,28 +330,97 @@ class VertexAIClient:
         Returns:
             List of prediction results for each batch
         """
-        logger.info(f"Making {len(batch_instances)} parallel batch predictions")
+        logger.info("Making %d parallel batch predictions", len(batch_instances))
         
-        tasks = [
-            self.predict_async(endpoint, instances, parameters)
-            for instances in batch_instances
-        ]
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        
+        async def bounded_predict(instances: List[Dict[str, Any]]) -> List[Any]:
+            async with semaphore:
+                return await self.predict_async(endpoint, instances, parameters)
+        
+        tasks = [bounded_predict(instances) for instances in batch_instances]
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Handle exceptions
-        successful_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Batch {i} failed: {result}")
-                successful_results.append([])
-            else:
-                successful_results.append(result)
+        failures = [
+            (i, result) for i, result in enumerate(results)
+            if isinstance(result, Exception)
+        ]
+        for i, error in failures:
+            logger.error("Batch %d failed: %s", i, error)
         
-        logger.info(f"✅ Completed {len(successful_results)} batch predictions")
+        successful_results = results
+        if failures:
+            successful_results = [
+                [] if isinstance(result, Exception) else result
+                for result in results
+            ]
+        
+        logger.info("✅ Completed %d batch predictions", len(successful_results))
         
         return successful_results
     
+    def predict_batched(
+        self,
+        endpoint: aiplatform.Endpoint,
+        batch_instances: List[List[Dict[str, Any]]],
+        max_batch: int = 64,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Any]]:
+        """
+        Make predictions for many small batches using as few requests as possible
+        
+        Instances from all batches are concatenated and sent in requests of
+        up to max_batch instances, then the predictions are split back into
+        the original batches. Requests run on the shared thread pool.
+        
+        Args:
+            endpoint: Endpoint to query
+            batch_instances: List of batches, each containing instances
+            max_batch: Maximum instances per request
+            parameters: Optional prediction parameters
+            
+        Returns:
+            List of prediction results for each batch, in input order
+        """
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        
+        # Flatten, remembering where each batch starts and ends
+        flat_instances = []
+        boundaries = []
+        for instances in batch_instances:
+            start = len(flat_instances)
+            flat_instances.extend(instances)
+            boundaries.append((start, len(flat_instances)))
+        
+        chunks = [
+            flat_instances[i:i + max_batch]
+            for i in range(0, len(flat_instances), max_batch)
+        ]
+        
+        logger.info(
+            "Making %d batched predictions for %d instances in %d requests",
+            len(batch_instances),
+            len(flat_instances),
+            len(chunks)
+        )
+        
+        predictions = []
+        for chunk_predictions in self._executor.map(
+            lambda chunk: self.predict(endpoint, chunk, parameters),
+            chunks
+        ):
+            predictions.extend(chunk_predictions)
+        
+        if len(predictions) != len(flat_instances):
+            raise ValueError(
+                f"Expected {len(flat_instances)} predictions, got {len(predictions)}"
+            )
+        
+        return [predictions[start:end] for start, end in boundaries]
+    
     def update_traffic_split(
         self,
         endpoint: aiplatform.Endpoint,
@@ -335,8 +434,8 @@ class VertexAIClient:
             traffic_split: Dict mapping deployed_model_id to traffic percentage
                           Example: {"1234": 90, "5678": 10}
         """
-        logger.info(f"Updating traffic split for endpoint {endpoint.display_name}")
-        logger.info(f"Traffic split: {traffic_split}")
+        logger.info("Updating traffic split for endpoint %s", endpoint.display_name)
+        logger.info("Traffic split: %s", traffic_split)
         
         # Validate traffic split sums to 100
         total_traffic = sum(traffic_split.values())
@@ -359,7 +458,7 @@ class VertexAIClient:
             endpoint: Endpoint containing the model
             deployed_model_id: ID of deployed model to remove
         """
-        logger.info(f"Undeploying model {deployed_model_id} from endpoint {endpoint.display_name}")
+        logger.info("Undeploying model %s from endpoint %s", deployed_model_id, endpoint.display_name)
         
         endpoint.undeploy(deployed_model_id=deployed_model_id, sync=True)
         
@@ -372,7 +471,7 @@ class VertexAIClient:
         Args:
             endpoint: Endpoint to delete
         """
-        logger.info(f"Deleting endpoint: {endpoint.display_name}")
+        logger.info("Deleting endpoint: %s", endpoint.display_name)
         
         endpoint.delete(force=True, sync=True)
         